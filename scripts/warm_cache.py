@@ -0,0 +1,69 @@
+"""Precompute answers to the app's suggested queries, served without expiry.
+
+Run from the repository root with the usual API keys set:
+
+    python scripts/warm_cache.py
+
+The output is loaded by RAGSystem at startup when Config.WARM_CACHE_ENABLED is set.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from config import Config  # noqa: E402
+from query_rag import RAGSystem  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the warm response cache for suggested queries")
+    parser.add_argument("--output", type=Path, default=Config.WARM_CACHE_PATH,
+                        help="Where to write the cache file.")
+    parser.add_argument("--similarity_k", type=int, default=Config.DEFAULT_SIMILARITY_K,
+                        help="Number of results to retrieve, must match the app setting.")
+    parser.add_argument("--info_source", type=str, default="NHS",
+                        help="Information source to query.")
+    args = parser.parse_args()
+
+    # Start empty so stale entries from a previous run aren't re-exported
+    Config.WARM_CACHE_ENABLED = False
+    rag_system = RAGSystem()
+
+    entries = []
+    for llm_model in Config.LLM_MODELS:
+        for query_text in Config.SUGGESTED_QUERIES:
+            print(f"Generating: [{llm_model}] {query_text}")
+            response_chunks, sources_data, failed = [], [], False
+            for chunk, sources in rag_system.query_rag_stream(
+                query_text=query_text,
+                llm_model=llm_model,
+                similarity_k=args.similarity_k,
+                info_source=args.info_source
+            ):
+                response_chunks.append(chunk)
+                if sources is not None:
+                    failed = failed or not sources
+                    sources_data = sources
+
+            if failed:
+                print(f"  Skipped, generation failed: {''.join(response_chunks)}")
+                continue
+
+            entries.append({
+                "query": query_text,
+                "llm_model": llm_model,
+                "similarity_k": args.similarity_k,
+                "info_source": args.info_source,
+                "response": "".join(response_chunks),
+                "sources": sources_data,
+            })
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(entries)} entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Sequence
+
+import numpy as np
+
+
+def normalize_query(query_text: str) -> str:
+    """Cache key form of a query, ignoring case and runs of whitespace"""
+    return " ".join(query_text.lower().split())
+
+
+def _expiry(ttl: Optional[float]) -> Optional[float]:
+    return time.monotonic() + ttl if ttl is not None else None
+
+
+def _expired(expires_at: Optional[float]) -> bool:
+    return expires_at is not None and expires_at <= time.monotonic()
+
+
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry
+
+    Entries older than ttl seconds, if given, are treated as misses.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            try:
+                expires_at, value = self._data[key]
+            except KeyError:
+                return None
+            if _expired(expires_at):
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store value under key, evicting the oldest entry when full"""
+        with self._lock:
+            self._data[key] = (_expiry(self.ttl), value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SemanticCache:
+    """Thread-safe cache matching entries by cosine similarity of their embeddings
+
+    Entries older than ttl seconds, if given, are treated as misses.
+    """
+
+    def __init__(self, threshold: float, maxsize: int, ttl: Optional[float] = None):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Unit-normalized embeddings and their values, grouped by scope
+        self._vectors = {}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, scope: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        """Return the value of the most similar entry in scope if it meets the threshold"""
+        query = self._normalize(embedding)
+        with self._lock:
+            vectors = self._vectors.get(scope)
+            if vectors is None:
+                return None
+
+            scores = vectors @ query
+            best = int(np.argmax(scores))
+            expires_at, value = self._values[scope][best]
+            if scores[best] >= self.threshold and not _expired(expires_at):
+                return value
+            return None
+
+    def put(self, scope: Hashable, embedding: Sequence[float], value: Any):
+        """Add an entry to scope, dropping the oldest one when full"""
+        vector = self._normalize(embedding)[np.newaxis, :]
+        entry = (_expiry(self.ttl), value)
+        with self._lock:
+            vectors = self._vectors.get(scope)
+            if vectors is None:
+                self._vectors[scope] = vector
+                self._values[scope] = [entry]
+                return
+
+            values = self._values[scope]
+            if len(values) >= self.maxsize:
+                vectors = vectors[1:]
+                values.pop(0)
+            self._vectors[scope] = np.vstack([vectors, vector])
+            values.append(entry)
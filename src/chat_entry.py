@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from typing import Dict, List
+
+
+@dataclass
+class ChatEntry:
+    """A completed chat turn kept in the session history"""
+    # Declared by hand as dataclass(slots=True) needs Python 3.10
+    __slots__ = ("display_query", "response", "sources_data", "llm_model")
+
+    display_query: str
+    response: str
+    sources_data: List[Dict]
+    llm_model: str
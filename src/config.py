@@ -1,9 +1,14 @@
 from enum import Enum
 from dataclasses import dataclass
+from pathlib import Path
 
 class InfoSource(Enum):
     NHS = "nhs"
 
+# Lookups by value, so validating a source needs no exception handling
+VALID_SOURCE_VALUES = frozenset(s.value for s in InfoSource)
+SOURCES_BY_VALUE = {s.value: s for s in InfoSource}
+
 @dataclass
 class SourceConfig:
     context_description: str
@@ -14,6 +19,45 @@ class Config:
     
     # Default similarity search parameters
     DEFAULT_SIMILARITY_K = 5
+
+    # Maximum number and age in seconds of full responses kept for reuse
+    RESPONSE_CACHE_SIZE = 500
+    RESPONSE_CACHE_TTL = 24 * 60 * 60
+
+    # Reuse a previous answer for a query whose embedding is at least this
+    # cosine-similar. Off by default: near-miss questions such as type 1 vs
+    # type 2 diabetes can clear an untuned threshold and get the wrong answer
+    SEMANTIC_CACHE_ENABLED = False
+    SEMANTIC_CACHE_THRESHOLD = 0.92
+    SEMANTIC_CACHE_SIZE = 256
+
+    # Maximum number of query embeddings kept to avoid repeat Voyage calls
+    EMBEDDING_CACHE_SIZE = 1024
+
+    # Maximum number of Pinecone result lists kept, shared across LLM models,
+    # expiring after RESPONSE_CACHE_TTL
+    RETRIEVAL_CACHE_SIZE = 256
+
+    # Limits on retrieved text sent to the LLM (tokens estimated as chars / 4)
+    MAX_DOC_CHARS = 2000
+    MAX_CONTEXT_TOKENS = 12000
+
+    # Keep-alive connections shared by all sessions for Voyage API calls
+    HTTP_POOL_SIZE = 10
+
+    # LLM models offered in the app, first is the default
+    LLM_MODELS = ("gemini-2.5-flash-lite", "gemini-2.5-flash")
+
+    # Queries offered as one-click suggestions in the app
+    SUGGESTED_QUERIES = (
+        "What are the symptoms of ADHD in adults?",
+        "How is type 2 diabetes diagnosed?",
+        "What are the treatment options for depression?"
+    )
+
+    # Precomputed answers to the suggested queries, built by scripts/warm_cache.py
+    WARM_CACHE_ENABLED = True
+    WARM_CACHE_PATH = Path(__file__).parent / "warm_cache.json"
     
     SOURCE_CONFIGS = {
         InfoSource.NHS: SourceConfig(
@@ -25,10 +69,9 @@ class Config:
     @classmethod
     def get_source_config(cls, source: str) -> SourceConfig:
         """Get configuration for a source"""
-        try:
-            source_enum = InfoSource(source.lower())
-            return cls.SOURCE_CONFIGS[source_enum]
-        except ValueError:
+        source_enum = SOURCES_BY_VALUE.get(source.lower())
+        if source_enum is None:
             raise ValueError(f"Unknown source: {source}. Valid sources: {[s.value for s in InfoSource]}")
+        return cls.SOURCE_CONFIGS[source_enum]
 
 
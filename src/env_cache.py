@@ -0,0 +1,5 @@
+import os
+import types
+
+# Snapshot of the process environment, taken once at import
+ENV = types.MappingProxyType(dict(os.environ))
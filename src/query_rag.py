@@ -1,41 +1,172 @@
-import os
+import json
 import argparse
 import logging
+import functools
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Generator, Tuple
 from openai import OpenAI
-from config import Config, InfoSource
+import requests
+from config import Config, InfoSource, SOURCES_BY_VALUE, VALID_SOURCE_VALUES
 from search_engine import SearchEngine
+from cache import LRUCache, SemanticCache, normalize_query
+from env_cache import ENV
 import voyageai
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Separators in NHS section IDs that are shown as spaces
+_SECTION_SEPARATOR_TABLE = str.maketrans({'-': ' ', '_': ' '})
+
+# Layout of each retrieved document in the LLM context
+_CONTEXT_SECTION_TEMPLATE = "Source Information: [Section: {section}]\nContext: {document}{url_suffix}"
+
+# Static instructions for the LLM, formatted once per source at import
+_SYSTEM_PROMPT_TEMPLATE = (
+    "You are a medical AI assistant tasked with answering clinical questions strictly based on the provided {context_description} context. Follow the requirements below to ensure accurate, consistent, and professional responses.\n\n"
+    "# Response Rules\n\n"
+    "1. **Context Restriction**:\n"
+    "   - Only use information given in the provided NHS health information context.\n"
+    "   - Do not generate or speculate with information not explicitly found in the given context.\n\n"
+    "2. **Answer Format**:\n"
+    "   - Provide a clear and concise response based solely on the context.\n"
+    "   - When including a list, use standard markdown bullet points (`*` or `-`).\n"
+    "   - If a list follows introductory text, insert a line break before the first bullet point.\n"
+    "   - Each bullet point must be on its own line.\n\n"
+    "3. **Preserve Tables**:\n"
+    "   - If relevant markdown tables appear in the context, reproduce them in your answer.\n"
+    "   - Maintain the original structure, formatting, and content of any included tables.\n\n"
+    "4. **Links and URLs**:\n"
+    "   - Include any URLs or web links from the context directly in your response when relevant.\n"
+    "   - Integrate links naturally within sentences, using markdown syntax for clickable text links.\n"
+    "   - DO NOT generate or invent any URLs not explicitly present in the context.\n\n"
+    "5. **Markdown Link Formatting**:\n"
+    "   - In responses, only the descriptive text in brackets should be visible and clickable (e.g., `[NHS ADHD information](https://www.nhs.uk/conditions/attention-deficit-hyperactivity-disorder-adhd/)`).\n"
+    "   - Readers should never see raw URLs in the text.\n"
+    "   - Use descriptive link text like 'NHS ADHD information' or 'NHS depression guide' rather than generic terms.\n\n"
+    "6. **If No Relevant Information**:\n"
+    "   - If the context contains no relevant information, state clearly:\n"
+    "      *\"{not_found_message}\"*\n\n"
+    "# Output Format\n\n"
+    "- All responses should be in plain text, using markdown formatting for lists and links as required.\n"
+    "- Do not use code blocks.\n"
+    "- Answers should be concise, accurate, and formatted according to the rules above.\n\n"
+    "# Examples\n\n"
+    "**Example 1: Integration of markdown link in context**\n"
+    "Question: \"What are the symptoms of ADHD?\"\n"
+    "Context snippet: ...see the NHS information on ADHD symptoms...\n"
+    "Output:\n"
+    "According to the [NHS ADHD information](https://www.nhs.uk/conditions/attention-deficit-hyperactivity-disorder-adhd/), symptoms include...\n\n"
+    "**Example 2: Multiple condition references**\n"
+    "According to NHS guidance:\n"
+    "* Initial symptoms may include difficulty concentrating.\n"
+    "* For detailed information, see the [NHS ADHD guide](https://www.nhs.uk/conditions/adhd/).\n\n"
+    "**Example 3: No relevant context**\n"
+    "{not_found_message}\n\n"
+    "# Notes\n\n"
+    "- Never output information beyond what is provided in the supplied context.\n"
+    "- Always use markdown for lists and links.\n"
+    "- Make sure all markdown tables from context are preserved in your answer if relevant.\n"
+    "- Present links only as clickable text, not as bare URLs.\n"
+    "- Use descriptive link text that indicates the specific NHS condition or topic.\n\n"
+    "**REMINDER:**\n"
+    "Strictly adhere to all formatting and content rules above for every response."
+)
+
+_SYSTEM_PROMPTS = {
+    source: _SYSTEM_PROMPT_TEMPLATE.format(
+        context_description=source_config.context_description,
+        not_found_message=source_config.not_found_message,
+    )
+    for source, source_config in Config.SOURCE_CONFIGS.items()
+}
+
+# The Voyage SDK reads this process-wide hook and otherwise opens a session
+# per thread. Streamlit runs each browser session on its own thread, so
+# install one shared keep-alive pool here, once, before any client is built
+_voyage_session = requests.Session()
+_voyage_session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=Config.HTTP_POOL_SIZE))
+voyageai.requestssession = _voyage_session
+
+_GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+_PINECONE_NAMESPACE = "nhs_guidelines_voyage_3_large"
+
+
+@dataclass
+class _PreparedQuery:
+    """Retrieval output needed to generate and cache an LLM response"""
+    cache_key: Tuple
+    query_embedding: Tuple[float, ...]
+    messages: List[Dict]
+    sources_data: List[Dict]
+
+
 class RAGSystem:
     """Main RAG system class"""
     
     def __init__(self, shared_data=None):
         self.config = Config()
+
+        # API clients are created lazily by the cached properties below
+
+        # Final responses keyed on the normalized query and generation settings
+        self._response_cache = LRUCache(Config.RESPONSE_CACHE_SIZE, Config.RESPONSE_CACHE_TTL)
+        # Responses to paraphrased questions, matched on query embedding
+        self._semantic_cache = SemanticCache(
+            Config.SEMANTIC_CACHE_THRESHOLD, Config.SEMANTIC_CACHE_SIZE, Config.RESPONSE_CACHE_TTL
+        ) if Config.SEMANTIC_CACHE_ENABLED else None
+        # Precomputed answers, kept apart from the response cache so they never expire
+        self._warm_responses = {}
+
+        if Config.WARM_CACHE_ENABLED:
+            self._load_warm_cache(Config.WARM_CACHE_PATH)
         
-        # Initialize clients
-        gemini_api_key = os.getenv("GEMINI_API_KEY")
-        if gemini_api_key:
-            self.gemini_client = OpenAI(
-                api_key=gemini_api_key, 
-                base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
-            )
-        else:
-            self.gemini_client = None
-
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if openai_api_key:
-            self.openai_client = OpenAI(api_key=openai_api_key)
-        else:
-            self.openai_client = None
-            
-        self.voyage_client = voyageai.Client(api_key=os.getenv("VOYAGE_API_KEY"))
-        self.search_engine = SearchEngine(self.voyage_client)
+    @functools.cached_property
+    def gemini_client(self) -> Optional[OpenAI]:
+        """Gemini client via its OpenAI-compatible endpoint, or None without an API key"""
+        gemini_api_key = ENV.get("GEMINI_API_KEY")
+        if not gemini_api_key:
+            return None
+        return OpenAI(
+            api_key=gemini_api_key, 
+            base_url=_GEMINI_BASE_URL
+        )
+
+    @functools.cached_property
+    def openai_client(self) -> Optional[OpenAI]:
+        """OpenAI client, or None without an API key"""
+        openai_api_key = ENV.get("OPENAI_API_KEY")
+        if not openai_api_key:
+            return None
+        return OpenAI(api_key=openai_api_key)
+
+    @functools.cached_property
+    def voyage_client(self) -> voyageai.Client:
+        """Voyage AI client used for query embeddings"""
+        return voyageai.Client(api_key=ENV.get("VOYAGE_API_KEY"))
+
+    @functools.cached_property
+    def search_engine(self) -> SearchEngine:
+        """Pinecone search engine, connected on first query"""
+        return SearchEngine(self.voyage_client)
         
+    def warm_up(self, similarity_k: int = Config.DEFAULT_SIMILARITY_K):
+        """Create the search clients, open their connections and cache retrieval for suggested queries"""
+        self.search_engine.warm_up()
+
+        # Suggested queries are fixed, so their first click only needs the LLM
+        for query_text in self.config.SUGGESTED_QUERIES:
+            try:
+                self.search_engine.similarity_search(
+                    query_text,
+                    namespace=_PINECONE_NAMESPACE,
+                    top_k=similarity_k,
+                    query_embedding=self.search_engine.embed_query(query_text)
+                )
+            except Exception as e:
+                logger.warning(f"Warm-up failed for suggested query '{query_text}': {e}")
+
     def _validate_inputs(self, query_text: str, similarity_k: int, info_source: str):
         """Validate input parameters"""
         if not query_text or not query_text.strip():
@@ -44,13 +175,41 @@ class RAGSystem:
         if similarity_k <= 0:
             raise ValueError("similarity_k must be a positive integer")
         
-        try:
-            InfoSource(info_source.lower())
-        except ValueError:
+        if info_source.lower() not in VALID_SOURCE_VALUES:
             valid_sources = [s.value for s in InfoSource]
             raise ValueError(f"Invalid info_source '{info_source}'. Must be one of: {valid_sources}")
 
-    def _clean_section_id(self, section_id: str) -> str:
+    def _cache_key(self, query_text: str, llm_model: str, similarity_k: int, info_source: str) -> Tuple:
+        """Build the response cache key for a query"""
+        return (normalize_query(query_text), llm_model, similarity_k, info_source.lower())
+
+    def _load_warm_cache(self, path):
+        """Load answers precomputed by scripts/warm_cache.py"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load warm cache from {path}: {e}")
+            return
+
+        if not isinstance(entries, list):
+            logger.warning(f"Could not load warm cache from {path}: expected a list of entries")
+            return
+
+        # The cache is optional, so a malformed entry is skipped rather than failing startup
+        for entry in entries:
+            try:
+                cache_key = self._cache_key(entry['query'], entry['llm_model'], entry['similarity_k'], entry['info_source'])
+                self._warm_responses[cache_key] = (entry['response'], entry['sources'])
+            except (KeyError, TypeError, AttributeError) as e:
+                logger.warning(f"Skipping malformed warm cache entry in {path}: {e!r}")
+        logger.info(f"Loaded {len(self._warm_responses)} warm cache entries from {path}")
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _clean_section_id(section_id: str) -> str:
         """Clean section ID for display - NHS format: condition__section__part"""
         if not section_id or section_id == 'Unknown section':
             return section_id
@@ -60,174 +219,174 @@ class RAGSystem:
             parts = section_id.split('__')
             if len(parts) >= 2:
                 # Get condition and section, ignore part number
-                condition = parts[0].replace('-', ' ').replace('_', ' ').title()
+                condition = parts[0].translate(_SECTION_SEPARATOR_TABLE).title()
                 section = parts[1].replace('_', ' ').title()
                 return f"{condition} - {section}"
         
         # Fallback: just clean up underscores and dashes
-        clean_section = section_id.replace('_', ' ').replace('-', ' ').title()
-        return clean_section
+        return section_id.translate(_SECTION_SEPARATOR_TABLE).title()
     
-    def _get_context_text(self, results: List[Dict]) -> str:
-        """Generate context text from search results"""
-        context_text_sections = []
-
-        for doc in results:
-            section_id = doc['metadata'].get('original_id', 'Unknown section')
-            url = doc['metadata'].get('url', '')
-            document_text = doc['metadata'].get('document', '')
-            
-            # Clean up section_id for display
-            clean_section_id = self._clean_section_id(section_id)
-            
-            # Create formatted section without showing URL explicitly
-            # The URL will be available in the document_text if it was part of the original content
-            formatted_section = (
-                f"Source Information: [Section: {clean_section_id}]\n"
-                f"Context: {document_text}"
-                f"{f' Available at: {url}' if url else ''}"  # Include URL for LLM to use
-            )
-            context_text_sections.append(formatted_section)
-        
-        return "\n\n---\n\n".join(context_text_sections)
-        
-    def _create_system_prompt(self, context_text: str, context_description: str, 
-                            not_found_message: str, query_text: str) -> List[Dict]:
-        """Create system prompt for LLM"""
+    def _create_system_prompt(self, context_text: str, source: InfoSource, query_text: str) -> List[Dict]:
+        """Create LLM messages with the static system prompt as a stable prefix"""
+        context_description = self.config.SOURCE_CONFIGS[source].context_description
         return [
             {
                 "role": "system",
-                "content": (
-                    f"You are a medical AI assistant tasked with answering clinical questions strictly based on the provided {context_description} context. Follow the requirements below to ensure accurate, consistent, and professional responses.\n\n"
-                    "# Response Rules\n\n"
-                    "1. **Context Restriction**:\n"
-                    "   - Only use information given in the provided NHS health information context.\n"
-                    "   - Do not generate or speculate with information not explicitly found in the given context.\n\n"
-                    "2. **Answer Format**:\n"
-                    "   - Provide a clear and concise response based solely on the context.\n"
-                    "   - When including a list, use standard markdown bullet points (`*` or `-`).\n"
-                    "   - If a list follows introductory text, insert a line break before the first bullet point.\n"
-                    "   - Each bullet point must be on its own line.\n\n"
-                    "3. **Preserve Tables**:\n"
-                    "   - If relevant markdown tables appear in the context, reproduce them in your answer.\n"
-                    "   - Maintain the original structure, formatting, and content of any included tables.\n\n"
-                    "4. **Links and URLs**:\n"
-                    "   - Include any URLs or web links from the context directly in your response when relevant.\n"
-                    "   - Integrate links naturally within sentences, using markdown syntax for clickable text links.\n"
-                    "   - DO NOT generate or invent any URLs not explicitly present in the context.\n\n"
-                    "5. **Markdown Link Formatting**:\n"
-                    "   - In responses, only the descriptive text in brackets should be visible and clickable (e.g., `[NHS ADHD information](https://www.nhs.uk/conditions/attention-deficit-hyperactivity-disorder-adhd/)`).\n"
-                    "   - Readers should never see raw URLs in the text.\n"
-                    "   - Use descriptive link text like 'NHS ADHD information' or 'NHS depression guide' rather than generic terms.\n\n"
-                    "6. **If No Relevant Information**:\n"
-                    "   - If the context contains no relevant information, state clearly:\n"
-                    f"      *\"{not_found_message}\"*\n\n"
-                    "# Output Format\n\n"
-                    "- All responses should be in plain text, using markdown formatting for lists and links as required.\n"
-                    "- Do not use code blocks.\n"
-                    "- Answers should be concise, accurate, and formatted according to the rules above.\n\n"
-                    "# Examples\n\n"
-                    "**Example 1: Integration of markdown link in context**\n"
-                    "Question: \"What are the symptoms of ADHD?\"\n"
-                    "Context snippet: ...see the NHS information on ADHD symptoms...\n"
-                    "Output:\n"
-                    "According to the [NHS ADHD information](https://www.nhs.uk/conditions/attention-deficit-hyperactivity-disorder-adhd/), symptoms include...\n\n"
-                    "**Example 2: Multiple condition references**\n"
-                    "According to NHS guidance:\n"
-                    "* Initial symptoms may include difficulty concentrating.\n"
-                    "* For detailed information, see the [NHS ADHD guide](https://www.nhs.uk/conditions/adhd/).\n\n"
-                    "**Example 3: No relevant context**\n"
-                    f"{not_found_message}\n\n"
-                    "# Notes\n\n"
-                    "- Never output information beyond what is provided in the supplied context.\n"
-                    "- Always use markdown for lists and links.\n"
-                    "- Make sure all markdown tables from context are preserved in your answer if relevant.\n"
-                    "- Present links only as clickable text, not as bare URLs.\n"
-                    "- Use descriptive link text that indicates the specific NHS condition or topic.\n\n"
-                    "**REMINDER:**\n"
-                    "Strictly adhere to all formatting and content rules above for every response."
-                ),
+                "content": _SYSTEM_PROMPTS[source],
             },
             {
-                "role": "assistant", 
+                # Per-query context goes after the static system prompt so the
+                # provider can reuse its cached prefix across requests
+                "role": "user",
                 "content": (
                     f"Here is the context from {context_description} that you should use to answer the following question:\n\n{context_text}\n\n"
+                    f"Question: {query_text}"
                 ),
             },
-            {
-                "role": "user",
-                "content": query_text,
-            },
         ]
     
 
 
-    def get_sources_from_results(self, results: List[Dict], info_source: str) -> List[Dict]:
-        """Extract formatted sources from search results"""
+    @staticmethod
+    def _dedupe_results(results: List[Dict]) -> List[Dict]:
+        """Keep only the best-scoring part of each condition section"""
+        seen_sections = set()
+        deduped = []
+        for doc in results:
+            section_id = doc.get('metadata', {}).get('original_id')
+            if section_id:
+                # "adhd-adults__Overview__Part_2" -> "adhd-adults__Overview"
+                section_key = '__'.join(section_id.split('__')[:2])
+                if section_key in seen_sections:
+                    continue
+                seen_sections.add(section_key)
+            deduped.append(doc)
+        return deduped
+
+    def _build_context_and_sources(self, results: List[Dict], info_source: str) -> Tuple[str, List[Dict]]:
+        """Generate context text and formatted sources from search results in one pass"""
+        context_text_sections = []
         sources = []
+        context_chars = 0
+
+        # Results arrive sorted by score, so the budget keeps the best matches
         for doc in results:
             metadata = doc.get('metadata', {})
             section_id = metadata.get('original_id', 'Unknown section')
             source = metadata.get('source', 'Unknown')
             url = metadata.get('url', '')
+            document_text = metadata.get('document', '')[:self.config.MAX_DOC_CHARS]
             
-            # Clean section ID for display
+            # Clean up section_id for display
             clean_section_id = self._clean_section_id(section_id)
             
-            source_info = {
+            # Include URL for LLM to use
+            formatted_section = _CONTEXT_SECTION_TEMPLATE.format(
+                section=clean_section_id,
+                document=document_text,
+                url_suffix=' Available at: ' + url if url else ''
+            )
+            context_chars += len(formatted_section)
+            if context_text_sections and context_chars // 4 > self.config.MAX_CONTEXT_TOKENS:
+                break
+            context_text_sections.append(formatted_section)
+
+            sources.append({
                 'metadata': {
                     'source': source,
                     'original_id': section_id,
                     'url': url,
                     'clean_section': clean_section_id
                 }
-            }
-            sources.append(source_info)
-        return sources
+            })
+        
+        return "\n\n---\n\n".join(context_text_sections), sources
     
+    def _prepare_query(self, query_text: str, llm_model: str, similarity_k: int,
+                       info_source: str) -> Tuple[Optional[Tuple[str, List[Dict]]], Optional[_PreparedQuery]]:
+        """Answer a query from cache, or retrieve context and build its LLM messages
+
+        Returns (answer, None) when no LLM call is needed, else (None, prepared).
+        """
+        self._validate_inputs(query_text, similarity_k, info_source)
+        source = SOURCES_BY_VALUE[info_source.lower()]
+
+        # Replay a previously generated answer for the same question and settings
+        cache_key = self._cache_key(query_text, llm_model, similarity_k, info_source)
+        cached = self._warm_responses.get(cache_key) or self._response_cache.get(cache_key)
+        if cached is not None:
+            return cached, None
+        
+        # Embed once for both the semantic cache lookup and the Pinecone query
+        query_embedding = self.search_engine.embed_query(query_text)
+        if self._semantic_cache is not None:
+            # Not copied into the exact cache, so a bad match isn't pinned to this query
+            cached = self._semantic_cache.get(cache_key[1:], query_embedding)
+            if cached is not None:
+                return cached, None
+        
+        # Get similar documents using only similarity search
+        results = self.search_engine.similarity_search(
+            query_text, 
+            namespace=_PINECONE_NAMESPACE,
+            top_k=similarity_k,
+            query_embedding=query_embedding
+        )
+        
+        if not results:
+            return ("I couldn't find any relevant information to answer your question.", []), None
+        
+        # Generate context, sources and system prompt
+        results = self._dedupe_results(results)
+        context_text, sources_data = self._build_context_and_sources(results, info_source)
+        system_messages = self._create_system_prompt(
+            context_text, 
+            source,
+            query_text
+        )
+        return None, _PreparedQuery(cache_key, query_embedding, system_messages, sources_data)
+
+    def _cache_response(self, prepared: _PreparedQuery, response_text: str):
+        """Store a completed response in the response caches"""
+        response = (response_text, prepared.sources_data)
+        self._response_cache.put(prepared.cache_key, response)
+        if self._semantic_cache is not None:
+            self._semantic_cache.put(prepared.cache_key[1:], prepared.query_embedding, response)
+
     def query_rag_stream(self, query_text: str, llm_model: str, similarity_k: int = 25, info_source: str = "NHS", 
-                        filename_filter: Optional[str] = None) -> Generator[Tuple[str, List[Dict]], None, None]:
-        """Query RAG system with streaming response"""
+                        filename_filter: Optional[str] = None) -> Generator[Tuple[str, Optional[List[Dict]]], None, None]:
+        """Query RAG system with streaming response
+
+        Sources are sent with the first chunk and None with the rest. Errors
+        are reported as a chunk with an empty sources list.
+        """
         try:
-            self._validate_inputs(query_text, similarity_k, info_source)
-            source_config = self.config.get_source_config(info_source)
-            
-            # Use the correct namespace from your test
-            namespace = "nhs_guidelines_voyage_3_large"
-            
-            # Get similar documents using only similarity search
-            results = self.search_engine.similarity_search(
-                query_text, 
-                namespace=namespace,
-                top_k=similarity_k
-            )
-            
-            if not results:
-                yield "I couldn't find any relevant information to answer your question.", []
+            answer, prepared = self._prepare_query(query_text, llm_model, similarity_k, info_source)
+            if answer is not None:
+                yield answer
                 return
             
-            # Generate context and system prompt
-            context_text = self._get_context_text(results)
-            system_messages = self._create_system_prompt(
-                context_text, 
-                source_config.context_description,
-                source_config.not_found_message, 
-                query_text
-            )
-            
-            # Get sources for response
-            sources_data = self.get_sources_from_results(results, info_source)
-            
-            # Stream LLM response
-            yield from self._stream_llm_response(system_messages, query_text, llm_model, sources_data)
+            # Stream LLM response, caching it only if generation succeeded
+            response_chunks = []
+            completed = True
+            for content, chunk_sources in self._stream_llm_response(
+                prepared.messages, query_text, llm_model, prepared.sources_data
+            ):
+                if chunk_sources is not None and not chunk_sources:
+                    completed = False
+                response_chunks.append(content)
+                yield content, chunk_sources
+
+            if completed and response_chunks:
+                self._cache_response(prepared, "".join(response_chunks))
             
         except Exception as e:
             logger.error(f"Error in query_rag_stream: {e}")
             yield f"An error occurred while processing your query: {str(e)}", []
-    
+
     def _stream_llm_response(self, system_messages: List[Dict], query_text: str, 
-                           llm_model: str, sources_data: List[Dict]) -> Generator[Tuple[str, List[Dict]], None, None]:
-        """Stream LLM response"""
+                           llm_model: str, sources_data: List[Dict]) -> Generator[Tuple[str, Optional[List[Dict]]], None, None]:
+        """Stream LLM response, attaching sources to the first chunk only"""
         try:
             if "gemini" in llm_model.lower() and self.gemini_client:
                 stream = self.gemini_client.chat.completions.create(
@@ -237,10 +396,16 @@ class RAGSystem:
                     stream=True
                 )
                 
-                for chunk in stream:
-                    if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        yield content, sources_data
+                chunk_sources = sources_data
+                try:
+                    for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                            content = chunk.choices[0].delta.content
+                            yield content, chunk_sources
+                            chunk_sources = None
+                finally:
+                    # Release the connection even when the caller stops reading early
+                    stream.close()
                     
             else:
                 error_msg = f"Unsupported LLM model or client not available: {llm_model}"
@@ -253,7 +418,6 @@ class RAGSystem:
             yield f"Error generating response: {str(e)}", []
 
 
-
 def main():
     """Main function for CLI usage"""
     parser = argparse.ArgumentParser(description="RAG System Query Interface")
@@ -288,7 +452,8 @@ def main():
         ):
             print(chunk, end="", flush=True)
             response_text += chunk
-            sources_data = sources
+            if sources is not None:
+                sources_data = sources
         
         print("\n\n=== Sources Data ===\n")
         for i, source in enumerate(sources_data, 1):
@@ -1,10 +1,12 @@
 import voyageai
-from typing import List
+from typing import List, Optional, Sequence, Tuple
 import logging
-import os 
 from pinecone import Pinecone
+from cache import LRUCache, normalize_query
+from config import Config
+from env_cache import ENV
 
-pinecone_api_key = os.getenv("PINECONE_API_KEY")
+pinecone_api_key = ENV.get("PINECONE_API_KEY")
 
 class SearchEngine:
     """Handles similarity search"""
@@ -14,21 +16,47 @@ class SearchEngine:
         self.logger = logging.getLogger(__name__)
         self.pc = Pinecone(api_key=pinecone_api_key)
         self.index = self.pc.Index("nhs-conditions")
+        self._embedding_cache = LRUCache(Config.EMBEDDING_CACHE_SIZE)
+        # Expires with cached responses, so a regenerated answer sees current documents
+        self._retrieval_cache = LRUCache(Config.RETRIEVAL_CACHE_SIZE, Config.RESPONSE_CACHE_TTL)
     
-    def similarity_search(self, query_text: str, namespace: str, top_k: int = 5) -> List[dict]:
-        """Perform similarity search using Pinecone"""
+    def warm_up(self):
+        """Open the Pinecone connection ahead of the first query"""
         try:
-            # Embed the query using the same model 
-            query_embedding = self.vo.contextualized_embed(
+            self.index.describe_index_stats()
+        except Exception as e:
+            self.logger.warning(f"Pinecone warm-up failed: {e}")
+    
+    def embed_query(self, query_text: str) -> Tuple[float, ...]:
+        """Embed a query using the same model as the indexed documents"""
+        cache_key = normalize_query(query_text)
+        embedding = self._embedding_cache.get(cache_key)
+        if embedding is None:
+            embedding = tuple(self.vo.contextualized_embed(
                 inputs=[[query_text]], 
                 model="voyage-context-3", 
                 input_type="query", 
                 output_dimension=2048
-            ).results[0].embeddings[0]
+            ).results[0].embeddings[0])
+            self._embedding_cache.put(cache_key, embedding)
+        return embedding
+    
+    def similarity_search(self, query_text: str, namespace: str, top_k: int = 5,
+                          query_embedding: Optional[Sequence[float]] = None) -> List[dict]:
+        """Perform similarity search using Pinecone"""
+        cache_key = (normalize_query(query_text), namespace, top_k)
+        cached = self._retrieval_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        
+        try:
+            # Embed the query unless the caller already has its embedding
+            if query_embedding is None:
+                query_embedding = self.embed_query(query_text)
             
             # Search Pinecone
             results = self.index.query(
-                vector=query_embedding,
+                vector=list(query_embedding),
                 top_k=top_k,
                 namespace=namespace,
                 include_metadata=True
@@ -36,6 +64,9 @@ class SearchEngine:
             
             matches = results['matches']
             self.logger.info(f"Pinecone search found {len(matches)} results")
+            # An empty result may be transient, so only real matches are kept
+            if matches:
+                self._retrieval_cache.put(cache_key, list(matches))
             return matches
         
         except Exception as e:
@@ -1,13 +1,18 @@
 import streamlit as st
-from typing import Dict, List
+from typing import Dict, List, Tuple
 from pathlib import Path
-import os
+import queue
+import threading
+from html import escape
+import time
 
 page_icon = "🩺"  # Use emoji instead of file path for better compatibility
 st.set_page_config(page_title="NHS Clinical Assistant", layout="wide", page_icon=page_icon)
 
 try:
     from query_rag import RAGSystem
+    from config import Config
+    from chat_entry import ChatEntry
 except ImportError as e:
     st.error(f"Import error: {e}. Please ensure all required modules are available.")
     st.stop()
@@ -21,44 +26,72 @@ LOGO_PATH = current_dir / "nhs_logo.png"
 logo_path_str = str(LOGO_PATH) if LOGO_PATH.exists() else None
 
 LOGO_ALT = "NHS logo"
+# Keeps the logo around 60px tall
+LOGO_WIDTH = 140
+
+STYLE_PATH = current_dir / "style.css"
+
+
+@st.cache_resource(show_spinner=False)
+def load_css(path: Path) -> str:
+    """Read the app stylesheet once per process"""
+    return path.read_text(encoding="utf-8")
+
+
+# Repaint the streaming response at most this often, or once enough new text arrives
+STREAM_FLUSH_INTERVAL = 0.05
+STREAM_FLUSH_CHARS = 64
 
 
 # Initialize RAG System
+@st.cache_resource(show_spinner="Loading NHS knowledge base…")
 def get_rag_system():
-    """Initialize the RAG system"""
-    try:
-        return RAGSystem()
-    except Exception as e:
-        st.error(f"Failed to initialize RAG system: {e}")
-        return None
-
-# Initialize RAG system once at startup
-if 'rag_system' not in st.session_state:
-    st.session_state.rag_system = get_rag_system()
+    """Initialize the RAG system, shared by all sessions"""
+    rag_system = RAGSystem()
+    rag_system.warm_up()
+    return rag_system
 
-rag_system = st.session_state.rag_system
-if rag_system is None:
-    st.error("RAG system failed to initialize. Please check your configuration.")
+# Failures raise out of the cached function, so a later rerun retries them
+try:
+    rag_system = get_rag_system()
+except Exception as e:
+    st.error(f"Failed to initialize RAG system: {e}. Please check your configuration.")
     st.stop()
 
 # --- Helper Functions ---
+def escape_sources(sources_data: List[Dict]) -> List[Dict]:
+    """Copy sources with display fields HTML-escaped, done once per turn"""
+    escaped = []
+    for source_info in sources_data:
+        metadata = dict(source_info.get('metadata', {}))
+        metadata['clean_section'] = escape(metadata.get('clean_section', 'Unknown Section'))
+        metadata['url'] = escape(metadata.get('url', ''), quote=True)
+        escaped.append({**source_info, 'metadata': metadata})
+    return escaped
+
+
 def display_sources(sources_data: List[Dict]):
-    """Display sources with clean NHS formatting"""
+    """Display sources with clean NHS formatting
+
+    Expects sources already passed through escape_sources.
+    """
     if not sources_data:
         st.markdown("No sources available for this response.")
         return
 
+    # Build all sources into one element rather than one markdown call each
+    source_parts = []
     for idx, source_info in enumerate(sources_data):
         # Get metadata from source_info
         metadata = source_info.get('metadata', {})
         clean_section = metadata.get('clean_section', 'Unknown Section')
         url = metadata.get('url', '')
         
-        source_text = f"<div class='source-item'><div class='source-title'>Source {idx+1}: {clean_section}</div>"
+        source_parts.append(f"<div class='source-item'><div class='source-title'>Source {idx+1}: {clean_section}</div>")
         if url:
-            source_text += f"<div class='source-link'>🔗 <a href='{url}' target='_blank'>View online</a></div>"
-        source_text += "</div>"
-        st.markdown(source_text, unsafe_allow_html=True)
+            source_parts.append(f"<div class='source-link'>🔗 <a href='{url}' target='_blank'>View online</a></div>")
+        source_parts.append("</div>")
+    st.markdown("".join(source_parts), unsafe_allow_html=True)
 
 
 def initialize_session_state():
@@ -76,144 +109,20 @@ def initialize_session_state():
     if "query_to_run_next" not in st.session_state: 
         st.session_state.query_to_run_next = None 
     if "similarity_k" not in st.session_state:
-        st.session_state.similarity_k = 5
+        st.session_state.similarity_k = Config.DEFAULT_SIMILARITY_K
     if "llm_model" not in st.session_state:
-        st.session_state.llm_model = "gemini-2.5-flash-lite"
+        st.session_state.llm_model = Config.LLM_MODELS[0]
 
 
 initialize_session_state()
+# A run interrupted mid-answer never cleared the flag, so re-enable the inputs
+if st.session_state.processing_query and st.session_state.query_to_run_next is None:
+    st.session_state.processing_query = False
 
 # --- STYLING ---
-st.markdown("""
-<style>
-  /* Import a modern font */
-  @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;600;700&display=swap');
-
-  :root{
-    --bg:#f6f8fa;
-    --card:#ffffff;
-    --accent:#1f7a8c;    /* deep teal */
-    --accent-2:#2b6777;
-    --muted:#6b7280;
-    --green:#16a34a;
-  }
-
-  html, body, [class*="css"]  {
-    font-family: 'Inter', system-ui, -apple-system, "Segoe UI", Roboto, "Helvetica Neue", Arial;
-    color: #0f1724;
-    background: linear-gradient(180deg, var(--bg) 0%, #ffffff 100%);
-  }
-
-  /* Main container */
-  .main .block-container {
-    padding-top: 8px;
-    padding-left: 28px;
-    padding-right: 28px;
-    max-width: 1200px;
-    margin: 0 auto;
-  }
-
-  /* Header */
-  .app-header{
-    display:flex;
-    align-items:center;
-    justify-content:space-between;
-    gap:12px;
-    margin-bottom:12px;
-  }
-  .app-title {
-    display:flex;
-    align-items:center;
-    gap:12px;
-  }
-  .logo {
-    background: linear-gradient(135deg, var(--accent), var(--accent-2));
-    color: white;
-    width:44px;
-    height:44px;
-    display:flex;
-    align-items:center;
-    justify-content:center;
-    font-weight:700;
-    border-radius:10px;
-    box-shadow: 0 6px 18px rgba(43,103,119,0.12);
-  }
-  .title-text { font-size:20px; font-weight:700; letter-spacing: -0.2px; }
-
-  /* Card-like chat area */
-  .chat-card {
-    background: var(--card);
-    border-radius: 12px;
-    padding: 18px;
-    box-shadow: 0 6px 20px rgba(20,23,30,0.04);
-  }
-
-  /* Chat bubbles */
-  .chat-bubble {
-    max-width:78%;
-    padding:12px 14px;
-    border-radius:12px;
-    margin-bottom:10px;
-    line-height:1.4;
-    box-shadow: 0 4px 12px rgba(15,23,36,0.04);
-  }
-  .chat-bubble.user {
-    background: linear-gradient(90deg, rgba(255,255,255,1), rgba(255,255,255,1));
-    border: 1px solid rgba(16,24,40,0.06);
-    margin-left:auto;
-    border-bottom-right-radius:6px;
-  }
-  .chat-bubble.assistant {
-    background: linear-gradient(180deg, rgba(31,122,140,0.06), rgba(43,103,119,0.03));
-    border-left: 4px solid var(--accent);
-    border-bottom-left-radius:6px;
-    margin-right:auto;
-  }
-
-  .chat-meta {
-    font-size:12px;
-    color:var(--muted);
-    margin-bottom:6px;
-  }
-
-  /* Sources */
-  .source-item { padding:10px 12px; border-radius:8px; background:#fbfcfd; margin-bottom:8px; border:1px solid rgba(16,24,40,0.03); }
-  .source-title { font-weight:600; color:var(--accent-2); margin-bottom:4px; }
-  .source-link a { color:var(--accent); text-decoration:none; font-weight:600; }
-  .source-link a:hover { text-decoration:underline; }
-
-  /* Buttons / chips */
-  .stButton>button {
-    border-radius:999px !important;
-    padding:8px 14px !important;
-    background: linear-gradient(90deg, #ffffff, #f7fafb) !important;
-    border: 1px solid rgba(16,24,40,0.06) !important;
-    color: #0f1724 !important;
-    box-shadow: 0 4px 10px rgba(12,18,28,0.04);
-  }
-  .stButton>button:active { transform: translateY(1px); }
-
-  /* Suggested chips */
-  .suggested-chips { display:flex; gap:8px; flex-wrap:wrap; margin-bottom:12px; }
-  .chip {
-    display:inline-flex;
-    gap:8px;
-    align-items:center;
-    padding:8px 12px;
-    border-radius:999px;
-    background: rgba(47,128,237,0.06);
-    color: #164e63;
-    border:1px solid rgba(47,128,237,0.12);
-    cursor:pointer;
-    font-weight:600;
-    font-size:13px;
-  }
-
-  /* small helpers */
-  .muted { color:var(--muted); font-size:13px; }
-  hr.stDivider { border: none; height:1px; background: linear-gradient(90deg, transparent, rgba(15,23,36,0.06), transparent); margin: 16px 0; }
-</style>
-""", unsafe_allow_html=True)
+# Streamlit drops elements that aren't re-emitted, so the style block is sent
+# on every rerun; only reading the file is cached
+st.markdown(f"<style>\n{load_css(STYLE_PATH)}</style>", unsafe_allow_html=True)
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -221,16 +130,15 @@ with st.sidebar:
 
     st.header("⚙️ Settings") 
 
-    llm_options = ["gemini-2.5-flash-lite", "gemini-2.5-flash"]
     try:
-        current_llm_index = llm_options.index(st.session_state.llm_model)
+        current_llm_index = Config.LLM_MODELS.index(st.session_state.llm_model)
     except ValueError:
         current_llm_index = 0
-        st.session_state.llm_model = llm_options[0]
+        st.session_state.llm_model = Config.LLM_MODELS[0]
 
     selected_llm = st.selectbox(
         "LLM Model", 
-        options=llm_options,
+        options=Config.LLM_MODELS,
         key="llm_model_selector", 
         index=current_llm_index
     )
@@ -251,19 +159,10 @@ with st.sidebar:
 # Header area with logo, title and small info
 header_cols = st.columns([0.12, 0.76, 0.12])
 with header_cols[0]:
-    if logo_path_str and os.path.exists(logo_path_str):
-        # Use HTML to control sizing while preserving quality
-        import base64
-        with open(logo_path_str, "rb") as img_file:
-            img_base64 = base64.b64encode(img_file.read()).decode()
-        
-        st.markdown(f"""
-        <div style="display: flex; justify-content: center; align-items: center;">
-            <img src="data:image/png;base64,{img_base64}" 
-                 style="max-width: 100%; height: auto; max-height: 60px; object-fit: contain;" 
-                 alt="NHS Logo">
-        </div>
-        """, unsafe_allow_html=True)
+    if logo_path_str:
+        # Served from Streamlit's media endpoint at a content-hashed URL, so the
+        # browser caches it instead of receiving the PNG inline on every rerun
+        st.image(logo_path_str, width=LOGO_WIDTH)
     else:
         # Fallback: display emoji or text if logo not found
         st.markdown('<div style="font-size:56px;">🩺</div>', unsafe_allow_html=True)
@@ -288,100 +187,160 @@ with header_cols[2]:
 
 st.markdown('<div class="chat-card">', unsafe_allow_html=True)
 
-def submit_and_process_query(query_to_send: str, display_query_text: str):
-    st.session_state.processing_query = True 
+def start_response_stream(query_to_send: str, llm_model: str, similarity_k: int,
+                          stop: threading.Event) -> queue.Queue:
+    """Run the RAG stream on a worker thread, returning a queue of its chunks
+
+    The queue ends with None. Setting stop closes the LLM stream at its next
+    chunk. The worker never touches Streamlit APIs, as those are only valid
+    on the script thread.
+    """
+    chunks = queue.Queue()
+
+    def run():
+        stream = rag_system.query_rag_stream(
+            query_to_send,
+            llm_model, 
+            info_source="NHS",
+            similarity_k=similarity_k,
+        )
+        try:
+            for item in stream:
+                if stop.is_set():
+                    break
+                chunks.put(item)
+        except Exception as e:
+            chunks.put((f"An error occurred while processing your query: {e}", []))
+        finally:
+            # Stops generation, and its token usage, if the reader has gone
+            stream.close()
+            chunks.put(None)
+
+    threading.Thread(target=run, daemon=True).start()
+    return chunks
+
+def stream_response(query_to_send: str, llm_model: str, similarity_k: int,
+                    response_placeholder) -> Tuple[str, List[Dict]]:
+    """Stream a response into the placeholder, returning the full text and its sources"""
+    stop = threading.Event()
+    chunks = start_response_stream(query_to_send, llm_model, similarity_k, stop)
+    response_str = ""
+    sources_data = []
+    pending_chars = 0
+    last_flush = time.monotonic()
+
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=STREAM_FLUSH_INTERVAL)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+
+            if item:
+                chunk, chunk_sources_data = item
+                response_str += chunk
+                if chunk_sources_data is not None:
+                    sources_data = chunk_sources_data
+                pending_chars += len(chunk)
+            
+            # Coalesce deltas so the whole bubble isn't re-rendered per token,
+            # flushing leftovers when the stream pauses
+            now = time.monotonic()
+            if pending_chars and (pending_chars >= STREAM_FLUSH_CHARS or now - last_flush >= STREAM_FLUSH_INTERVAL):
+                response_placeholder.markdown(response_str)
+                pending_chars = 0
+                last_flush = now
+    finally:
+        # Also reached when Streamlit interrupts this run, so the worker stops
+        stop.set()
+
+    return response_str, sources_data
+
+def queue_query(query_text: str):
+    """Widget callback: runs before the script, so the inputs render disabled"""
+    st.session_state.processing_query = True
+    st.session_state.query_to_run_next = query_text
+
+def queue_chat_input():
+    queue_query(st.session_state.chat_input)
+
+def submit_and_process_query(query_to_send: str):
+    # Settings for this turn, read once from session state
+    llm_model = st.session_state.llm_model
+    similarity_k = st.session_state.similarity_k
     
     try:
-        with st.spinner("Retrieving relevant NHS information..."):
-            response_chunks = []
-            sources_data = []
+        with st.spinner("Retrieving relevant NHS information..."), st.chat_message("assistant"):
             temp_response_placeholder = st.empty()
-            
-            for chunk, chunk_sources_data in rag_system.query_rag_stream(
-                query_to_send,
-                st.session_state.llm_model, 
-                info_source="NHS",
-                similarity_k=st.session_state.similarity_k,
-            ):
-                response_chunks.append(chunk)
-                sources_data = chunk_sources_data 
-                
-                temp_response_placeholder.markdown(
-                    f"<div class='chat-bubble assistant'>{''.join(response_chunks)}</div>",
-                    unsafe_allow_html=True
-                )
-            
-            final_response = ''.join(response_chunks)
+            final_response, sources_data = stream_response(
+                query_to_send, llm_model, similarity_k, temp_response_placeholder
+            )
             temp_response_placeholder.empty()
 
-            st.session_state.chat_history.append({
-                "query_sent": query_to_send,
-                "display_query": display_query_text,
-                "response": final_response,
-                "sources_data": sources_data,
-                "llm_model": st.session_state.llm_model
-            })
+            st.session_state.chat_history.append(ChatEntry(
+                display_query=query_to_send,
+                response=final_response,
+                sources_data=escape_sources(sources_data),
+                llm_model=llm_model
+            ))
             
     except Exception as e:
         st.error(f"Error processing query: {e}")
     finally:
         st.session_state.processing_query = False
+        # The only rerun per query, so the inputs render enabled again
         st.rerun()
 
 # Display chat history
-for i, chat_entry in enumerate(st.session_state.chat_history):
-    # user
-    st.markdown(f"<div class='chat-bubble user'><div class='chat-meta'>You</div><div>{chat_entry['display_query']}</div></div>", unsafe_allow_html=True)
-    
-    response_info = f"(LLM: {chat_entry.get('llm_model', 'N/A')})"
-    
-    st.markdown(f"<div class='chat-bubble assistant'><div class='chat-meta'>Assistant {response_info}</div><div>{chat_entry['response']}</div></div>", unsafe_allow_html=True)
-
-    st.markdown("<div style='margin-top:8px; font-weight:600;'>📚 Sources</div>", unsafe_allow_html=True)
-    with st.expander("View Sources", expanded=False):
-        sources_data = chat_entry.get("sources_data", [])
-        if sources_data:
-            display_sources(sources_data)
-        else:
-            st.markdown("No sources available for this response.")
+for chat_entry in st.session_state.chat_history:
+    with st.chat_message("user"):
+        st.markdown(chat_entry.display_query)
+
+    with st.chat_message("assistant"):
+        st.caption(f"LLM: {chat_entry.llm_model}")
+        st.markdown(chat_entry.response)
+
+        st.markdown("<div style='margin-top:8px; font-weight:600;'>📚 Sources</div>", unsafe_allow_html=True)
+        with st.expander("View Sources", expanded=False):
+            sources_data = chat_entry.sources_data
+            if sources_data:
+                display_sources(sources_data)
+            else:
+                st.markdown("No sources available for this response.")
     st.markdown('<hr class="stDivider">', unsafe_allow_html=True)
 
 # Suggested queries - styled as chips
 st.markdown("<div style='margin-top:6px; margin-bottom:8px; font-weight:600;'>💡 Suggested Queries</div>", unsafe_allow_html=True)
-suggested_queries_list = [
-    "What are the symptoms of ADHD in adults?",
-    "How is type 2 diabetes diagnosed?",
-    "What are the treatment options for depression?"
-]
-
 # Render chips in a row. Use buttons beneath for accessibility & state handling.
 chip_cols = st.columns([1,1,1])
-for idx, sq in enumerate(suggested_queries_list):
+for idx, sq in enumerate(Config.SUGGESTED_QUERIES):
     with chip_cols[idx]:
-        if st.button(sq, key=f"suggested_{idx}", disabled=st.session_state.processing_query):
-            st.session_state.processing_query = True
-            st.session_state.query_to_run_next = sq
-            st.rerun()
+        st.button(
+            sq,
+            key=f"suggested_{idx}",
+            on_click=queue_query,
+            args=(sq,),
+            disabled=st.session_state.processing_query
+        )
 
 st.markdown('<div style="height:8px"></div>', unsafe_allow_html=True)
 
 # User input section
-user_query = st.chat_input(
+st.chat_input(
     "e.g., What are the symptoms of ADHD?", 
+    key="chat_input",
     max_chars=1000, 
+    on_submit=queue_chat_input,
     disabled=st.session_state.processing_query
 )
 
-if user_query:
-    st.session_state.processing_query = True
-    st.session_state.query_to_run_next = user_query
-    st.rerun()
-
-# Process query if one is set to run next
-if st.session_state.get("query_to_run_next"):
+# Queued by a callback, so answer in this run rather than rerunning first
+if st.session_state.query_to_run_next:
     query_to_process = st.session_state.query_to_run_next
     st.session_state.query_to_run_next = None  # Clear it so it doesn't run again
-    submit_and_process_query(query_to_process, query_to_process)
+    submit_and_process_query(query_to_process)
 
 st.markdown('</div>', unsafe_allow_html=True)
 